@@ -36,6 +36,14 @@ CHAIN_ID = "base"
 MIN_LIQUIDITY_USD = 2_500   # > 1 ETH (approx $2.5k) – no upper limit
 MIN_VOLUME_24H = 1_000      # > $1K 24h volume
 TOP_N = 10                  # keep top 10 gainers per scan
+TOKENS_BATCH_SIZE = 30      # DexScreener tokens endpoint limit per request
+
+SEARCH_QUERIES = [
+    "WETH", "USDC",           # Core quote tokens (ensures tradeability)
+    "trending", "base",       # General discovery
+    "DEGEN", "BRETT", "TOSHI", "HIGHER",  # Popular Base ecosystem tokens
+    "meme", "social", "AI",   # Category-based discovery
+]
 
 # 0x / Matcha referral swap link configuration
 SWAP_FEE_BPS = 10  # 0.1 %
@@ -55,12 +63,20 @@ def get_supabase() -> SupabaseClient | None:
     return create_client(SUPABASE_URL, SUPABASE_KEY)
 
 
-def get_openai() -> OpenAI | None:
-    """Return an OpenAI client, or None if key is missing."""
+def get_openai(timeout: float | None = None, max_retries: int | None = None) -> OpenAI | None:
+    """
+    Return an OpenAI client, or None if key is missing.
+    `timeout` / `max_retries` override the SDK defaults when given.
+    """
     if not OPENAI_API_KEY:
         logger.warning("OpenAI API key missing – token summaries disabled.")
         return None
-    return OpenAI(api_key=OPENAI_API_KEY)
+    options = {}
+    if timeout is not None:
+        options["timeout"] = timeout
+    if max_retries is not None:
+        options["max_retries"] = max_retries
+    return OpenAI(api_key=OPENAI_API_KEY, **options)
 
 
 # ---------------------------------------------------------------------------
@@ -85,36 +101,33 @@ def fetch_top_boosted_base_tokens() -> list[str]:
     return addresses
 
 
+def search_base_pairs(query: str) -> list[dict]:
+    """Run a single DexScreener search and return the Base pairs it found."""
+    try:
+        resp = requests.get(
+            DEXSCREENER_SEARCH_URL,
+            params={"q": query},
+            timeout=15,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+    except Exception as exc:
+        logger.warning("DexScreener search '%s' failed: %s", query, exc)
+        return []
+
+    return [p for p in data.get("pairs", []) if p.get("chainId") == CHAIN_ID]
+
+
 def fetch_base_gainers() -> list[dict]:
     """
     Fetch trending/top pairs on Base using DexScreener search.
     We search several queries to maximise coverage, then deduplicate.
     """
-    queries = [
-        "WETH", "USDC",           # Core quote tokens (ensures tradeability)
-        "trending", "base",       # General discovery
-        "DEGEN", "BRETT", "TOSHI", "HIGHER",  # Popular Base ecosystem tokens
-        "meme", "social", "AI",   # Category-based discovery
-    ]
     seen_pairs: set[str] = set()
     all_pairs: list[dict] = []
 
-    for q in queries:
-        try:
-            resp = requests.get(
-                DEXSCREENER_SEARCH_URL,
-                params={"q": q},
-                timeout=15,
-            )
-            resp.raise_for_status()
-            data = resp.json()
-        except Exception as exc:
-            logger.warning("DexScreener search '%s' failed: %s", q, exc)
-            continue
-
-        for pair in data.get("pairs", []):
-            if pair.get("chainId") != CHAIN_ID:
-                continue
+    for q in SEARCH_QUERIES:
+        for pair in search_base_pairs(q):
             pair_addr = pair.get("pairAddress", "")
             if pair_addr in seen_pairs:
                 continue
@@ -188,13 +201,21 @@ def fetch_gecko_trending() -> list[dict]:
     return pairs
 
 
+def chunk_addresses(token_addresses: list[str]) -> list[list[str]]:
+    """Split addresses into batches the DexScreener tokens endpoint accepts."""
+    return [
+        token_addresses[i:i + TOKENS_BATCH_SIZE]
+        for i in range(0, len(token_addresses), TOKENS_BATCH_SIZE)
+    ]
+
+
 def fetch_token_pairs(token_addresses: list[str]) -> list[dict]:
     """Fetch detailed pair data for a batch of token addresses on Base."""
     if not token_addresses:
         return []
 
     # DexScreener supports up to 30 comma-separated addresses
-    batch = token_addresses[:30]
+    batch = token_addresses[:TOKENS_BATCH_SIZE]
     addr_str = ",".join(batch)
 
     try:
@@ -210,6 +231,21 @@ def fetch_token_pairs(token_addresses: list[str]) -> list[dict]:
     return pairs
 
 
+def merge_pairs(*sources: list[dict]) -> list[dict]:
+    """Merge pair lists in order, keeping the first pair seen per base token."""
+    seen: set[str] = set()
+    all_pairs: list[dict] = []
+    for source in sources:
+        for pair in source:
+            # Deduplicate by base token address (not pair address)
+            base_addr = (pair.get("baseToken") or {}).get("address", "")
+            if not base_addr or base_addr in seen:
+                continue
+            seen.add(base_addr)
+            all_pairs.append(pair)
+    return all_pairs
+
+
 def select_top_gainers(pairs: list[dict]) -> list[dict]:
     """
     Filter and sort pairs to find the top gainers.
@@ -358,12 +394,71 @@ def cleanup_old_signals(sb: SupabaseClient) -> None:
 # Orchestrator
 # ---------------------------------------------------------------------------
 
+def process_gainer(
+    sb: SupabaseClient | None, ai: OpenAI | None, entry: dict,
+) -> None:
+    """Enrich one selected gainer (GPT summary + swap link) and save it."""
+    pair = entry["pair"]
+    base_token = pair.get("baseToken", {})
+    token_address = base_token.get("address", "")
+    token_name = base_token.get("name", "Unknown")
+    token_symbol = base_token.get("symbol", "???")
+    price_usd = float(pair.get("priceUsd") or 0)
+    display_name = f"{token_name} ({token_symbol})"
+
+    logger.info(
+        "🚀 %s  |  24h: %+.1f%%  |  Vol: $%.0f  |  Liq: $%.0f",
+        display_name,
+        entry["price_change_24h"],
+        entry["volume_24h"],
+        entry["liquidity_usd"],
+    )
+
+    # ----- GPT summary (single call per token, not in a loop) -----
+    token_summary = ""
+    if ai:
+        try:
+            token_summary = summarise_token(
+                ai, token_name, token_symbol,
+                entry["price_change_24h"], entry["volume_24h"],
+            )
+            logger.info("  GPT: %s", token_summary)
+        except Exception as exc:
+            logger.error("  GPT call failed: %s", exc)
+
+    # ----- Swap link -----
+    swap_link = build_swap_link(token_address)
+
+    # ----- Save -----
+    signal = {
+        "token_address": token_address,
+        "pair_address": pair.get("pairAddress", ""),
+        "liquidity_usd": entry["liquidity_usd"],
+        "price_usd": price_usd,
+        "swap_link": swap_link,
+        "token_name": display_name,
+        "token_summary": token_summary,
+        "price_change_24h": entry["price_change_24h"],
+        "volume_24h": entry["volume_24h"],
+        "market_cap": float(pair.get("marketCap") or pair.get("fdv") or 0),
+        "dex_url": pair.get("url", ""),
+    }
+
+    if sb:
+        try:
+            save_signal(sb, signal)
+        except Exception as exc:
+            logger.error("Supabase save failed: %s", exc)
+    else:
+        logger.info("Signal (not saved): %s", signal)
+
+
 def scan_top_gainers() -> None:
     """
     Main scan routine – called every 5 min by APScheduler.
 
     1. Fetch boosted Base tokens from DexScreener.
-    2. Fetch detailed pair data for boosted tokens.
+    2. Fetch detailed pair data for boosted tokens (in batches of 30).
     3. Fetch trending Base pairs from DexScreener search.
     3b. Fetch trending Base pools from GeckoTerminal.
     4. Merge all sources, deduplicate by token address.
@@ -382,7 +477,9 @@ def scan_top_gainers() -> None:
     boosted_addresses = fetch_top_boosted_base_tokens()
 
     # --- 2. Get pair data for boosted tokens ---
-    boosted_pairs = fetch_token_pairs(boosted_addresses)
+    boosted_pairs: list[dict] = []
+    for batch in chunk_addresses(boosted_addresses):
+        boosted_pairs.extend(fetch_token_pairs(batch))
 
     # --- 3. Get trending pairs via DexScreener search ---
     search_pairs = fetch_base_gainers()
@@ -391,15 +488,7 @@ def scan_top_gainers() -> None:
     gecko_pairs = fetch_gecko_trending()
 
     # --- 4. Merge all pairs (deduplicate by baseToken address) ---
-    seen: set[str] = set()
-    all_pairs: list[dict] = []
-    for pair in boosted_pairs + search_pairs + gecko_pairs:
-        # Deduplicate by base token address (not pair address)
-        base_addr = (pair.get("baseToken") or {}).get("address", "")
-        if not base_addr or base_addr in seen:
-            continue
-        seen.add(base_addr)
-        all_pairs.append(pair)
+    all_pairs = merge_pairs(boosted_pairs, search_pairs, gecko_pairs)
 
     logger.info("Total unique pairs to evaluate: %d", len(all_pairs))
 
@@ -415,59 +504,7 @@ def scan_top_gainers() -> None:
 
     # --- 6-8. Process each gainer ---
     for entry in gainers:
-        pair = entry["pair"]
-        base_token = pair.get("baseToken", {})
-        token_address = base_token.get("address", "")
-        token_name = base_token.get("name", "Unknown")
-        token_symbol = base_token.get("symbol", "???")
-        price_usd = float(pair.get("priceUsd") or 0)
-        display_name = f"{token_name} ({token_symbol})"
-
-        logger.info(
-            "🚀 %s  |  24h: %+.1f%%  |  Vol: $%.0f  |  Liq: $%.0f",
-            display_name,
-            entry["price_change_24h"],
-            entry["volume_24h"],
-            entry["liquidity_usd"],
-        )
-
-        # ----- GPT summary (single call per token, not in a loop) -----
-        token_summary = ""
-        if ai:
-            try:
-                token_summary = summarise_token(
-                    ai, token_name, token_symbol,
-                    entry["price_change_24h"], entry["volume_24h"],
-                )
-                logger.info("  GPT: %s", token_summary)
-            except Exception as exc:
-                logger.error("  GPT call failed: %s", exc)
-
-        # ----- Swap link -----
-        swap_link = build_swap_link(token_address)
-
-        # ----- Save -----
-        signal = {
-            "token_address": token_address,
-            "pair_address": pair.get("pairAddress", ""),
-            "liquidity_usd": entry["liquidity_usd"],
-            "price_usd": price_usd,
-            "swap_link": swap_link,
-            "token_name": display_name,
-            "token_summary": token_summary,
-            "price_change_24h": entry["price_change_24h"],
-            "volume_24h": entry["volume_24h"],
-            "market_cap": float(pair.get("marketCap") or pair.get("fdv") or 0),
-            "dex_url": pair.get("url", ""),
-        }
-
-        if sb:
-            try:
-                save_signal(sb, signal)
-            except Exception as exc:
-                logger.error("Supabase save failed: %s", exc)
-        else:
-            logger.info("Signal (not saved): %s", signal)
+        process_gainer(sb, ai, entry)
 
     # --- 9. Cleanup old signals ---
     if sb:
@@ -4,6 +4,7 @@ Reads values from ../.env (or environment variables).
 """
 
 import os
+import socket
 from dotenv import load_dotenv
 
 load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
@@ -14,3 +15,18 @@ SUPABASE_URL     = os.getenv("SUPABASE_URL", "")
 SUPABASE_KEY     = os.getenv("SUPABASE_SERVICE_ROLE_KEY") or os.getenv("SUPABASE_KEY", "")
 OPENAI_API_KEY   = os.getenv("OPENAI_API_KEY", "")
 REFERRAL_WALLET  = os.getenv("REFERRAL_WALLET", "")
+
+# Opt-in scan profiling (see profiler.py). 0 disables periodic profiling;
+# the signal / flag-file triggers still work.
+PROFILE_EVERY_N       = int(os.getenv("PROFILE_EVERY_N", "0"))
+PROFILE_DIR           = os.getenv("PROFILE_DIR", os.path.join(os.path.dirname(__file__), "profiles"))
+PROFILE_KEEP          = int(os.getenv("PROFILE_KEEP", "10"))
+PROFILE_FLAG_FILE     = os.getenv("PROFILE_FLAG_FILE", os.path.join(PROFILE_DIR, "PROFILE_NEXT"))
+TRACK_ALLOCATIONS     = os.getenv("TRACK_ALLOCATIONS", "").lower() in ("1", "true", "yes")
+
+# Sharded worker mode (see worker.py). LEASE_STORE is "supabase" or
+# "sqlite:<path>" for a local single-host stand-in.
+WORKER_MODE           = os.getenv("WORKER_MODE", "").lower() in ("1", "true", "yes")
+WORKER_ID             = os.getenv("WORKER_ID") or f"{socket.gethostname()}-{os.getpid()}"
+LEASE_STORE           = os.getenv("LEASE_STORE", "supabase")
+LEASE_TTL_SECONDS     = int(os.getenv("LEASE_TTL_SECONDS", "60"))
@@ -0,0 +1,256 @@
+"""
+LiquiTrace – lease store for sharded scan workers (leases.py)
+
+Each scan round is split into work units (rows keyed by round + unit key).
+A worker leases one unit at a time for LEASE_TTL_SECONDS; if it dies the
+lease simply expires and another worker picks the unit up.
+
+Two interchangeable backends with the same methods:
+- SupabaseLeaseStore – `scan_units` table + `claim_scan_unit` RPC (schema.sql)
+- SQLiteLeaseStore   – local file, for single-host runs and tests
+"""
+
+import json
+import logging
+import sqlite3
+import time
+
+from supabase import Client as SupabaseClient
+
+from config import LEASE_STORE
+
+logger = logging.getLogger("liquitrace.leases")
+
+
+# ---------------------------------------------------------------------------
+# Supabase / Postgres
+# ---------------------------------------------------------------------------
+
+class SupabaseLeaseStore:
+    """Lease store backed by the Supabase `scan_units` table."""
+
+    def __init__(self, sb: SupabaseClient) -> None:
+        self.sb = sb
+
+    def enqueue(self, round_id: str, units: list[dict]) -> None:
+        """Insert units (`key`, `kind`, `payload`); existing keys are left alone."""
+        if not units:
+            return
+        rows = [
+            {
+                "round_id": round_id,
+                "unit_key": u["key"],
+                "kind": u["kind"],
+                "payload": u.get("payload", {}),
+            }
+            for u in units
+        ]
+        self.sb.table("scan_units").upsert(
+            rows, on_conflict="round_id,unit_key", ignore_duplicates=True,
+        ).execute()
+
+    def claim(self, round_id: str, worker_id: str, kinds: tuple[str, ...], ttl: int) -> dict | None:
+        """Lease one pending or expired unit of `kinds`, or None if none is free."""
+        res = self.sb.rpc("claim_scan_unit", {
+            "p_round_id": round_id,
+            "p_worker_id": worker_id,
+            "p_kinds": list(kinds),
+            "p_ttl_seconds": ttl,
+        }).execute()
+        if not res.data:
+            return None
+        row = res.data[0]
+        return {"key": row["unit_key"], "kind": row["kind"], "payload": row.get("payload") or {}}
+
+    def complete(self, round_id: str, key: str, worker_id: str, result) -> bool:
+        """Mark a unit done. Returns False if the lease was lost to another worker."""
+        res = (
+            self.sb.table("scan_units")
+            .update({"status": "done", "result": result, "lease_until": None})
+            .eq("round_id", round_id)
+            .eq("unit_key", key)
+            .eq("owner", worker_id)
+            .execute()
+        )
+        return bool(res.data)
+
+    def release(self, round_id: str, key: str, worker_id: str, max_attempts: int, fallback) -> bool:
+        """
+        Give back a unit whose handler failed and count the attempt. After
+        `max_attempts` failures the unit is marked done with `fallback`.
+        Returns True if the unit was given up on.
+        """
+        res = self.sb.rpc("release_scan_unit", {
+            "p_round_id": round_id,
+            "p_unit_key": key,
+            "p_worker_id": worker_id,
+            "p_max_attempts": max_attempts,
+            "p_fallback": fallback,
+        }).execute()
+        return bool(res.data) and res.data[0]["status"] == "done"
+
+    def results(self, round_id: str, kind: str) -> list[dict]:
+        """Return finished units of `kind` as dicts with key / payload / result."""
+        res = (
+            self.sb.table("scan_units")
+            .select("unit_key,payload,result")
+            .eq("round_id", round_id)
+            .eq("kind", kind)
+            .eq("status", "done")
+            .execute()
+        )
+        return [
+            {"key": r["unit_key"], "payload": r.get("payload") or {}, "result": r.get("result")}
+            for r in res.data or []
+        ]
+
+    def outstanding(self, round_id: str, kinds: tuple[str, ...]) -> int:
+        """Count units of `kinds` that are not done yet (pending or leased)."""
+        res = (
+            self.sb.table("scan_units")
+            .select("unit_key", count="exact")
+            .eq("round_id", round_id)
+            .in_("kind", list(kinds))
+            .neq("status", "done")
+            .execute()
+        )
+        return res.count or 0
+
+    def purge(self, before_round: str) -> None:
+        """Delete all units of rounds older than `before_round`."""
+        self.sb.table("scan_units").delete().lt("round_id", before_round).execute()
+
+
+# ---------------------------------------------------------------------------
+# SQLite (local stand-in)
+# ---------------------------------------------------------------------------
+
+class SQLiteLeaseStore:
+    """Lease store backed by a local SQLite file (safe across processes)."""
+
+    def __init__(self, path: str) -> None:
+        # isolation_level=None → explicit BEGIN IMMEDIATE for atomic claims
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("""
+            create table if not exists scan_units (
+                round_id text not null,
+                unit_key text not null,
+                kind text not null,
+                payload text default '{}',
+                status text not null default 'pending',
+                owner text,
+                lease_until real,
+                attempts integer not null default 0,
+                result text,
+                primary key (round_id, unit_key)
+            )
+        """)
+
+    def enqueue(self, round_id: str, units: list[dict]) -> None:
+        self.conn.executemany(
+            "insert or ignore into scan_units (round_id, unit_key, kind, payload) values (?, ?, ?, ?)",
+            [(round_id, u["key"], u["kind"], json.dumps(u.get("payload", {}))) for u in units],
+        )
+
+    def claim(self, round_id: str, worker_id: str, kinds: tuple[str, ...], ttl: int) -> dict | None:
+        now = time.time()
+        marks = ",".join("?" * len(kinds))
+        self.conn.execute("begin immediate")
+        try:
+            row = self.conn.execute(
+                f"""
+                select unit_key, kind, payload from scan_units
+                 where round_id = ? and kind in ({marks})
+                   and (status = 'pending' or (status = 'leased' and lease_until < ?))
+                 order by unit_key
+                 limit 1
+                """,
+                (round_id, *kinds, now),
+            ).fetchone()
+            if row:
+                self.conn.execute(
+                    "update scan_units set status = 'leased', owner = ?, lease_until = ?"
+                    " where round_id = ? and unit_key = ?",
+                    (worker_id, now + ttl, round_id, row[0]),
+                )
+            self.conn.execute("commit")
+        except Exception:
+            self.conn.execute("rollback")
+            raise
+        if not row:
+            return None
+        return {"key": row[0], "kind": row[1], "payload": json.loads(row[2] or "{}")}
+
+    def complete(self, round_id: str, key: str, worker_id: str, result) -> bool:
+        cur = self.conn.execute(
+            "update scan_units set status = 'done', result = ?, lease_until = null"
+            " where round_id = ? and unit_key = ? and owner = ?",
+            (json.dumps(result), round_id, key, worker_id),
+        )
+        return cur.rowcount > 0
+
+    def release(self, round_id: str, key: str, worker_id: str, max_attempts: int, fallback) -> bool:
+        self.conn.execute("begin immediate")
+        try:
+            cur = self.conn.execute(
+                """
+                update scan_units
+                   set attempts = attempts + 1,
+                       status = case when attempts + 1 >= ? then 'done' else 'pending' end,
+                       result = case when attempts + 1 >= ? then ? else result end,
+                       owner = null,
+                       lease_until = null
+                 where round_id = ? and unit_key = ? and owner = ? and status = 'leased'
+                """,
+                (max_attempts, max_attempts, json.dumps(fallback), round_id, key, worker_id),
+            )
+            row = None
+            if cur.rowcount:
+                row = self.conn.execute(
+                    "select status from scan_units where round_id = ? and unit_key = ?",
+                    (round_id, key),
+                ).fetchone()
+            self.conn.execute("commit")
+        except Exception:
+            self.conn.execute("rollback")
+            raise
+        return bool(row) and row[0] == "done"
+
+    def results(self, round_id: str, kind: str) -> list[dict]:
+        rows = self.conn.execute(
+            "select unit_key, payload, result from scan_units"
+            " where round_id = ? and kind = ? and status = 'done'",
+            (round_id, kind),
+        ).fetchall()
+        return [
+            {"key": k, "payload": json.loads(p or "{}"), "result": json.loads(r) if r else None}
+            for k, p, r in rows
+        ]
+
+    def outstanding(self, round_id: str, kinds: tuple[str, ...]) -> int:
+        marks = ",".join("?" * len(kinds))
+        (count,) = self.conn.execute(
+            f"select count(*) from scan_units where round_id = ? and kind in ({marks}) and status != 'done'",
+            (round_id, *kinds),
+        ).fetchone()
+        return count
+
+    def purge(self, before_round: str) -> None:
+        self.conn.execute("delete from scan_units where round_id < ?", (before_round,))
+
+
+# ---------------------------------------------------------------------------
+# Factory
+# ---------------------------------------------------------------------------
+
+def get_lease_store(sb: SupabaseClient | None) -> SupabaseLeaseStore | SQLiteLeaseStore | None:
+    """Return the store selected by LEASE_STORE, or None if it can't be built."""
+    if LEASE_STORE.startswith("sqlite:"):
+        return SQLiteLeaseStore(LEASE_STORE[len("sqlite:"):])
+    if LEASE_STORE != "supabase":
+        logger.error("Unknown LEASE_STORE '%s' – expected 'supabase' or 'sqlite:<path>'.", LEASE_STORE)
+        return None
+    if sb is None:
+        logger.error("LEASE_STORE=supabase but Supabase credentials are missing.")
+        return None
+    return SupabaseLeaseStore(sb)
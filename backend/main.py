@@ -1,13 +1,18 @@
 """
 LiquiTrace – entry point.
 Wires up APScheduler to run the top-gainers scanner every 5 minutes.
+With WORKER_MODE on, runs as one of several sharded scan workers instead.
 """
 
+import functools
 import logging
 from apscheduler.schedulers.blocking import BlockingScheduler
 
-from config import SUPABASE_URL
-from bot import scan_top_gainers
+from config import SUPABASE_URL, WORKER_MODE, WORKER_ID
+from bot import scan_top_gainers, get_supabase
+from leases import get_lease_store
+from profiler import ScanProfiler
+from worker import run_worker_round
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,12 +26,29 @@ def main() -> None:
     print("   Source    → DexScreener API (Top Gainers on Base)")
     print(f"   Supabase  → {SUPABASE_URL[:30]}…" if SUPABASE_URL else "   Supabase  → (not set)")
 
+    job = scan_top_gainers
+    if WORKER_MODE:
+        store = get_lease_store(get_supabase())
+        if store is None:
+            return
+        print(f"   Worker    → {WORKER_ID}")
+        job = functools.partial(run_worker_round, store, WORKER_ID)
+
+    # Opt-in profiling hooks (PROFILE_EVERY_N / SIGUSR1 / flag file)
+    profiler = ScanProfiler()
+    profiler.install_signal_handler()
+    scan = profiler.wrap(job)
+
     # Run one scan immediately on start-up
-    scan_top_gainers()
+    scan()
 
-    # Schedule future scans every 5 minutes (hemat – no 24/7 streaming)
+    # Schedule future scans every 5 minutes (hemat – no 24/7 streaming).
+    # Workers fire on the wall-clock 5-minute mark so they all join the same round.
     scheduler = BlockingScheduler()
-    scheduler.add_job(scan_top_gainers, "interval", minutes=5, id="signal_scan")
+    if WORKER_MODE:
+        scheduler.add_job(scan, "cron", minute="*/5", second=1, id="signal_scan")
+    else:
+        scheduler.add_job(scan, "interval", minutes=5, id="signal_scan")
     logger.info("Scheduler started – scanning every 5 min. Press Ctrl+C to stop.")
 
     try:
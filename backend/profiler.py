@@ -0,0 +1,227 @@
+"""
+LiquiTrace – opt-in scan profiling (profiler.py)
+
+Wraps the scan job so a single scan (or every Nth scan) can dump:
+
+- a cProfile CPU profile (`cpu.prof` + a readable `cpu.txt` summary)
+- a tracemalloc top-allocations diff taken across that scan (`alloc.txt`)
+
+Each profiled scan gets its own sub-directory under PROFILE_DIR; only the
+newest PROFILE_KEEP are kept.
+
+Runtime triggers (no restart needed):
+- `kill -USR1 <pid>`        → profile the next scan
+- `touch $PROFILE_FLAG_FILE` → profile the next scan (file is removed)
+
+With TRACK_ALLOCATIONS on, tracemalloc runs for the whole process and the
+traced-memory delta is logged after every scan so slow leaks in the
+long-running scheduler show up early.
+"""
+
+import cProfile
+import datetime
+import functools
+import io
+import logging
+import os
+import pstats
+import shutil
+import signal
+import tracemalloc
+from typing import Callable
+
+from config import (
+    PROFILE_EVERY_N,
+    PROFILE_DIR,
+    PROFILE_KEEP,
+    PROFILE_FLAG_FILE,
+    TRACK_ALLOCATIONS,
+)
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+
+TOP_ALLOCATIONS = 25       # lines written to alloc.txt
+TOP_FUNCTIONS = 40         # lines written to cpu.txt
+TRACEMALLOC_FRAMES = 1     # only the top frame is used (totals / "lineno" diff)
+LEAK_WARN_SCANS = 6        # warn after 6 consecutive growing scans (~30 min)
+
+logger = logging.getLogger("liquitrace.profiler")
+
+
+class ScanProfiler:
+    """Decides which scans to profile and writes/rotates the output."""
+
+    def __init__(
+        self,
+        every_n: int = PROFILE_EVERY_N,
+        out_dir: str = PROFILE_DIR,
+        keep: int = PROFILE_KEEP,
+        flag_file: str = PROFILE_FLAG_FILE,
+        track_allocations: bool = TRACK_ALLOCATIONS,
+    ) -> None:
+        self.every_n = max(every_n, 0)
+        self.out_dir = out_dir
+        self.keep = max(keep, 1)
+        self.flag_file = flag_file
+        self.track_allocations = track_allocations
+
+        self._scan_count = 0
+        self._armed = False           # set by SIGUSR1
+        self._last_traced = 0         # bytes traced after the previous scan
+        self._growth_streak = 0
+
+        # Create both up front so `touch $PROFILE_FLAG_FILE` works on a fresh install.
+        # Profiling is opt-in, so a read-only deploy must not stop the scanner.
+        for path in dict.fromkeys((self.out_dir, os.path.dirname(self.flag_file))):
+            if not path:
+                continue
+            try:
+                os.makedirs(path, exist_ok=True)
+            except OSError as exc:
+                logger.warning("Cannot create profiling directory %s (%s) – profiles won't be written.", path, exc)
+
+        if self.track_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+
+    # ------------------------------------------------------------------
+    # Triggers
+    # ------------------------------------------------------------------
+
+    def install_signal_handler(self) -> None:
+        """Arm the next scan on SIGUSR1 (no-op where SIGUSR1 is unavailable)."""
+        sigusr1 = getattr(signal, "SIGUSR1", None)
+        if sigusr1 is None:
+            logger.info("SIGUSR1 not available – use the flag file to trigger profiling.")
+            return
+        signal.signal(sigusr1, self._on_signal)
+        logger.info("Profiling trigger: kill -USR1 %d  or  touch %s", os.getpid(), self.flag_file)
+
+    def _on_signal(self, signum, frame) -> None:
+        self._armed = True
+        logger.info("Profiling armed for the next scan (signal %d).", signum)
+
+    def _consume_flag_file(self) -> bool:
+        if not os.path.exists(self.flag_file):
+            return False
+        try:
+            os.remove(self.flag_file)
+        except OSError as exc:
+            logger.warning("Could not remove profiling flag file: %s", exc)
+        return True
+
+    def _should_profile(self) -> bool:
+        # Evaluate every trigger so a stale flag file / signal is always consumed
+        periodic = self.every_n > 0 and self._scan_count % self.every_n == 0
+        flagged = self._consume_flag_file()
+        armed, self._armed = self._armed, False
+        return periodic or flagged or armed
+
+    # ------------------------------------------------------------------
+    # Wrapping
+    # ------------------------------------------------------------------
+
+    def wrap(self, fn: Callable[[], None]) -> Callable[[], None]:
+        """Return `fn` wrapped with profiling / allocation tracking."""
+
+        @functools.wraps(fn)
+        def wrapper() -> None:
+            self.run(fn)
+
+        return wrapper
+
+    def run(self, fn: Callable[[], None]) -> None:
+        """Run one scan, profiling it if any trigger fired."""
+        self._scan_count += 1
+        if not self._should_profile():
+            try:
+                fn()
+            finally:
+                self._log_allocation_growth()
+            return
+
+        # Start tracemalloc just for this scan if it isn't already running
+        started_here = not tracemalloc.is_tracing()
+        if started_here:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        before = tracemalloc.take_snapshot()
+
+        prof = cProfile.Profile()
+        prof.enable()
+        try:
+            fn()
+        finally:
+            prof.disable()
+            after = tracemalloc.take_snapshot()
+            if started_here:
+                tracemalloc.stop()
+            try:
+                self._write_report(prof, before, after)
+            except Exception as exc:
+                logger.error("Writing profile failed: %s", exc)
+            self._log_allocation_growth()
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+
+    def _write_report(
+        self, prof: cProfile.Profile,
+        before: tracemalloc.Snapshot, after: tracemalloc.Snapshot,
+    ) -> None:
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        scan_dir = os.path.join(self.out_dir, f"scan-{stamp}-{self._scan_count:05d}")
+        os.makedirs(scan_dir, exist_ok=True)
+
+        # --- CPU ---
+        prof.dump_stats(os.path.join(scan_dir, "cpu.prof"))
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+        with open(os.path.join(scan_dir, "cpu.txt"), "w", encoding="utf-8") as fh:
+            fh.write(buf.getvalue())
+
+        # --- Allocations (diff across this scan) ---
+        ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ]
+        diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+        with open(os.path.join(scan_dir, "alloc.txt"), "w", encoding="utf-8") as fh:
+            fh.write(f"Top {TOP_ALLOCATIONS} allocation changes during scan #{self._scan_count}\n\n")
+            for stat in diff[:TOP_ALLOCATIONS]:
+                fh.write(f"{stat}\n")
+
+        logger.info("Profile for scan #%d written to %s", self._scan_count, scan_dir)
+        self._rotate()
+
+    def _rotate(self) -> None:
+        """Keep only the newest `keep` scan-* directories."""
+        scans = sorted(
+            d for d in os.listdir(self.out_dir)
+            if d.startswith("scan-") and os.path.isdir(os.path.join(self.out_dir, d))
+        )
+        for old in scans[:-self.keep]:
+            shutil.rmtree(os.path.join(self.out_dir, old), ignore_errors=True)
+
+    def _log_allocation_growth(self) -> None:
+        """Log traced-memory growth since the previous scan."""
+        if not self.track_allocations or not tracemalloc.is_tracing():
+            return
+
+        current, peak = tracemalloc.get_traced_memory()
+        delta = current - self._last_traced if self._last_traced else 0
+        self._growth_streak = self._growth_streak + 1 if delta > 0 else 0
+        self._last_traced = current
+
+        logger.info(
+            "Memory after scan #%d: %.1f MiB traced (%+.1f KiB), peak %.1f MiB",
+            self._scan_count, current / 2**20, delta / 2**10, peak / 2**20,
+        )
+        if self._growth_streak >= LEAK_WARN_SCANS:
+            logger.warning(
+                "Traced memory has grown for %d consecutive scans – possible leak. "
+                "Trigger a profile to see the top allocations.",
+                self._growth_streak,
+            )
+        tracemalloc.reset_peak()
@@ -0,0 +1,90 @@
+"""Offline check of the scan profiler — triggers, rotation and leak warning against a temp dir."""
+import logging
+import os
+import signal
+import tempfile
+logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(name)-22s  %(levelname)-7s  %(message)s")
+
+import profiler
+from profiler import ScanProfiler
+
+
+def profiled_scans(out_dir: str) -> list[int]:
+    """Scan numbers that produced a profile directory."""
+    return sorted(int(d.rsplit("-", 1)[1]) for d in os.listdir(out_dir) if d.startswith("scan-"))
+
+
+def make(**kwargs) -> tuple[ScanProfiler, str]:
+    out_dir = os.path.join(tempfile.mkdtemp(), "profiles")
+    options = {"every_n": 0, "keep": 100, "track_allocations": False}
+    options.update(kwargs)
+    return ScanProfiler(out_dir=out_dir, flag_file=os.path.join(out_dir, "PROFILE_NEXT"), **options), out_dir
+
+
+def noop() -> None:
+    pass
+
+
+# --- 1. Every Nth scan ---
+prof, out_dir = make(every_n=3)
+scan = prof.wrap(noop)
+for _ in range(7):
+    scan()
+assert profiled_scans(out_dir) == [3, 6], profiled_scans(out_dir)
+for name in ("cpu.prof", "cpu.txt", "alloc.txt"):
+    assert os.path.exists(os.path.join(out_dir, os.listdir(out_dir)[0], name)), f"{name} missing"
+print("✅ every-Nth scan profiled")
+
+# --- 2. Flag file is consumed exactly once ---
+prof, out_dir = make()
+scan = prof.wrap(noop)
+assert os.path.isdir(out_dir), "flag-file directory not created at startup"
+open(prof.flag_file, "w").close()
+scan()
+scan()
+assert not os.path.exists(prof.flag_file), "flag file not removed"
+assert profiled_scans(out_dir) == [1], profiled_scans(out_dir)
+print("✅ flag file triggers one profile")
+
+# --- 3. SIGUSR1 is consumed exactly once ---
+if hasattr(signal, "SIGUSR1"):
+    prof, out_dir = make()
+    prof.install_signal_handler()
+    scan = prof.wrap(noop)
+    scan()
+    os.kill(os.getpid(), signal.SIGUSR1)
+    scan()
+    scan()
+    assert profiled_scans(out_dir) == [2], profiled_scans(out_dir)
+    print("✅ SIGUSR1 triggers one profile")
+else:
+    print("⏭  SIGUSR1 not available on this platform")
+
+# --- 4. Rotation keeps the newest `keep` profiles ---
+prof, out_dir = make(every_n=1, keep=2)
+scan = prof.wrap(noop)
+for _ in range(5):
+    scan()
+assert profiled_scans(out_dir) == [4, 5], profiled_scans(out_dir)
+print("✅ rotation keeps the newest profiles")
+
+# --- 5. Growth streak warning ---
+warnings: list[str] = []
+
+
+class Capture(logging.Handler):
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.levelno >= logging.WARNING:
+            warnings.append(record.getMessage())
+
+
+logging.getLogger("liquitrace.profiler").addHandler(Capture())
+leak: list[bytearray] = []
+prof, out_dir = make(track_allocations=True)
+scan = prof.wrap(lambda: leak.append(bytearray(200_000)))
+for _ in range(profiler.LEAK_WARN_SCANS):
+    scan()
+assert not warnings, "warned before the streak was long enough"
+scan()
+assert any("possible leak" in w for w in warnings), warnings
+print(f"✅ leak warning after {profiler.LEAK_WARN_SCANS} growing scans")
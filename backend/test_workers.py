@@ -0,0 +1,127 @@
+"""Offline check of the sharded worker — SQLiteLeaseStore, stubbed fetchers, two workers."""
+import datetime
+import logging
+import os
+import tempfile
+import threading
+import time
+logging.basicConfig(level=logging.INFO, format="%(asctime)s  %(name)-22s  %(levelname)-7s  %(message)s")
+
+import worker
+from leases import SQLiteLeaseStore
+
+db_path = os.path.join(tempfile.mkdtemp(), "leases.sqlite")
+calls: list[str] = []
+saved: list[str] = []
+lock = threading.Lock()
+
+
+def record(name: str) -> None:
+    with lock:
+        calls.append(name)
+    time.sleep(0.05)    # simulated network latency, so both workers get units
+
+
+def pair(addr: str, change: float) -> dict:
+    return {
+        "chainId": "base", "pairAddress": f"pair-{addr}",
+        "baseToken": {"address": addr, "name": addr, "symbol": addr},
+        "liquidity": {"usd": 50_000}, "volume": {"h24": 50_000},
+        "priceChange": {"h24": change},
+    }
+
+
+def fetch_boosts() -> list[str]:
+    record("boosts")
+    return [f"b{i:02d}" for i in range(45)]     # → 2 token chunks
+
+
+def fetch_tokens(addresses: list[str]) -> list[dict]:
+    record("tokens")
+    return [pair(a, int(a[1:])) for a in addresses]
+
+
+def search(query: str) -> list[dict]:
+    record("search")
+    return [pair(f"s-{query}", 1)]
+
+
+def gecko_down() -> list[dict]:
+    record("gecko")
+    raise RuntimeError("GeckoTerminal down")
+
+
+def merge_and_record(*sources):
+    record("merge")
+    return real_merge_pairs(*sources)
+
+
+def save(sb, ai, entry: dict) -> None:
+    record("enrich")
+    with lock:
+        saved.append(entry["pair"]["baseToken"]["address"])
+
+
+real_merge_pairs = worker.merge_pairs
+worker.fetch_top_boosted_base_tokens = fetch_boosts
+worker.fetch_token_pairs = fetch_tokens
+worker.search_base_pairs = search
+worker.fetch_gecko_trending = gecko_down
+worker.merge_pairs = merge_and_record
+worker.process_gainer = save
+worker.get_supabase = lambda: None
+worker.get_openai = lambda **kwargs: None
+
+# --- 1. Expired lease is reassigned; the old owner can't complete it ---
+store = SQLiteLeaseStore(db_path)
+store.enqueue("expiry", [{"key": "u1", "kind": "search"}])
+assert store.claim("expiry", "ghost", ("search",), 0)["key"] == "u1"
+time.sleep(0.01)
+assert store.claim("expiry", "live", ("search",), 60)["key"] == "u1", "expired lease not reassigned"
+assert store.claim("expiry", "other", ("search",), 60) is None, "live lease handed out twice"
+assert store.complete("expiry", "u1", "ghost", []) is False, "lost lease still completed"
+assert store.complete("expiry", "u1", "live", []) is True
+print("✅ expired lease reassigned, stale complete() rejected")
+
+# --- 2. Full round with two workers and a dead worker's lease ---
+start = datetime.datetime.now(datetime.timezone.utc)
+round_id = worker.round_key(start)
+store.enqueue(round_id, worker.initial_units())
+dead = store.claim(round_id, "dead-worker", ("search",), 2)   # never completed
+
+results: dict[str, int] = {}
+threads = [
+    threading.Thread(
+        target=lambda wid=wid: results.__setitem__(
+            wid, worker.run_worker_round(SQLiteLeaseStore(db_path), wid, start),
+        ),
+    )
+    for wid in ("w1", "w2")
+]
+for t in threads:
+    t.start()
+for t in threads:
+    t.join()
+
+statuses = dict(store.conn.execute(
+    "select status, count(*) from scan_units where round_id = ? group by status", (round_id,),
+).fetchall())
+(owner,) = store.conn.execute(
+    "select owner from scan_units where round_id = ? and unit_key = ?", (round_id, dead["key"]),
+).fetchone()
+merge_at = calls.index("merge")
+discovery = [i for i, c in enumerate(calls) if c in ("boosts", "tokens", "search", "gecko")]
+enrich = [i for i, c in enumerate(calls) if c == "enrich"]
+
+print(f"\n{'='*60}")
+print(f"Units per worker: {results}   statuses: {statuses}")
+print(f"Dead worker's unit {dead['key']} finished by: {owner}")
+print(f"Saved: {sorted(saved)}")
+print(f"{'='*60}\n")
+
+assert set(statuses) == {"done"}, "units left outstanding"
+assert owner in ("w1", "w2"), "dead worker's lease was not reassigned"
+assert calls.count("gecko") == worker.UNIT_MAX_ATTEMPTS, "failing unit not retried/given up"
+assert max(discovery) < merge_at < min(enrich), "phases ran out of order"
+assert sorted(saved) == [f"b{i:02d}" for i in range(35, 45)], "wrong top gainers"
+print("✅ two workers finished the round: leases reassigned, failing unit given up, phases in order")
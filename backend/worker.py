@@ -0,0 +1,246 @@
+"""
+LiquiTrace – sharded scan worker (worker.py)
+
+Runs the same pipeline as `bot.scan_top_gainers`, but split into work units
+that any number of worker processes lease from a shared store (leases.py):
+
+1. Discovery  – `boosts`, `gecko`, one `search:<query>` per SEARCH_QUERIES
+                entry, and `tokens:<n>` chunks enqueued once `boosts` is done.
+2. Merge      – a single `merge` unit (the coordinator step) runs once all
+                discovery is done: merges shard results, selects the top
+                gainers, enqueues one `enrich:<token>` unit each, cleans up.
+3. Enrichment – `enrich:<token>` units: GPT summary + swap link + upsert.
+
+Every worker runs `run_worker_round` on the same 5-minute schedule; rounds
+are keyed by wall-clock window, so all workers join the same round. A unit
+whose worker dies is re-leased once its lease expires; a unit whose handler
+keeps failing is given up on after UNIT_MAX_ATTEMPTS with an empty result,
+so the round carries on with partial data like `scan_top_gainers` does.
+"""
+
+import datetime
+import logging
+import time
+
+from openai import OpenAI
+from supabase import Client as SupabaseClient
+
+from bot import (
+    SEARCH_QUERIES,
+    get_supabase,
+    get_openai,
+    fetch_top_boosted_base_tokens,
+    chunk_addresses,
+    fetch_token_pairs,
+    search_base_pairs,
+    fetch_gecko_trending,
+    merge_pairs,
+    select_top_gainers,
+    process_gainer,
+    cleanup_old_signals,
+)
+from config import LEASE_TTL_SECONDS
+
+# ---------------------------------------------------------------------------
+# Constants
+# ---------------------------------------------------------------------------
+
+ROUND_MINUTES = 5           # must match the scheduler interval in main.py
+ROUND_MARGIN_SECONDS = 15   # stop working this long before the next round
+ROUND_RETENTION_HOURS = 6   # purge work units older than this
+POLL_SECONDS = 1            # wait between claims while others hold leases
+UNIT_MAX_ATTEMPTS = 3       # give up on a failing unit after this many tries
+
+DISCOVERY_KINDS = ("boosts", "tokens", "search", "gecko")
+MERGE_KINDS = ("merge",)
+ENRICH_KINDS = ("enrich",)
+
+logger = logging.getLogger("liquitrace.worker")
+
+
+# ---------------------------------------------------------------------------
+# Rounds
+# ---------------------------------------------------------------------------
+
+def round_start(now: datetime.datetime | None = None) -> datetime.datetime:
+    """Start of the ROUND_MINUTES window containing `now` (UTC)."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return now.replace(minute=now.minute - now.minute % ROUND_MINUTES, second=0, microsecond=0)
+
+
+def round_key(start: datetime.datetime) -> str:
+    """Sortable round id, e.g. 20250101T1205."""
+    return start.strftime("%Y%m%dT%H%M")
+
+
+def initial_units() -> list[dict]:
+    """Units every worker enqueues (idempotently) at the start of a round."""
+    units = [
+        {"key": "boosts", "kind": "boosts"},
+        {"key": "gecko", "kind": "gecko"},
+        {"key": "merge", "kind": "merge"},
+    ]
+    for i, q in enumerate(SEARCH_QUERIES):
+        units.append({"key": f"search:{i:03d}", "kind": "search", "payload": {"index": i, "query": q}})
+    return units
+
+
+# ---------------------------------------------------------------------------
+# Unit handlers
+# ---------------------------------------------------------------------------
+
+def run_boosts(store, round_id: str, payload: dict, sb: SupabaseClient | None, ai: OpenAI | None):
+    """Discover boosted tokens and enqueue one `tokens` chunk per batch."""
+    addresses = fetch_top_boosted_base_tokens()
+    chunks = chunk_addresses(addresses)
+    # Enqueue before completing so discovery never looks finished in between
+    store.enqueue(round_id, [
+        {"key": f"tokens:{i:03d}", "kind": "tokens", "payload": {"index": i, "addresses": chunk}}
+        for i, chunk in enumerate(chunks)
+    ])
+    return {"tokens": len(addresses), "chunks": len(chunks)}
+
+
+def run_tokens(store, round_id: str, payload: dict, sb: SupabaseClient | None, ai: OpenAI | None):
+    return fetch_token_pairs(payload["addresses"])
+
+
+def run_search(store, round_id: str, payload: dict, sb: SupabaseClient | None, ai: OpenAI | None):
+    return search_base_pairs(payload["query"])
+
+
+def run_gecko(store, round_id: str, payload: dict, sb: SupabaseClient | None, ai: OpenAI | None):
+    return fetch_gecko_trending()
+
+
+def _shard_pairs(store, round_id: str, kind: str) -> list[dict]:
+    """Concatenate the pair lists of finished `kind` units in enqueue order."""
+    shards = sorted(store.results(round_id, kind), key=lambda r: r["payload"].get("index", 0))
+    return [pair for shard in shards for pair in shard["result"] or []]
+
+
+def run_merge(store, round_id: str, payload: dict, sb: SupabaseClient | None, ai: OpenAI | None):
+    """Coordinator step: merge shard results, select gainers, fan out enrichment."""
+    all_pairs = merge_pairs(
+        _shard_pairs(store, round_id, "tokens"),
+        _shard_pairs(store, round_id, "search"),
+        _shard_pairs(store, round_id, "gecko"),
+    )
+    logger.info("Round %s: %d unique pairs to evaluate.", round_id, len(all_pairs))
+
+    gainers = select_top_gainers(all_pairs)
+    store.enqueue(round_id, [
+        {"key": f"enrich:{entry['pair'].get('baseToken', {}).get('address', '')}",
+         "kind": "enrich", "payload": entry}
+        for entry in gainers
+    ])
+
+    if sb:
+        cleanup_old_signals(sb)
+
+    cutoff = round_start() - datetime.timedelta(hours=ROUND_RETENTION_HOURS)
+    store.purge(round_key(cutoff))
+    return {"gainers": len(gainers)}
+
+
+def run_enrich(store, round_id: str, payload: dict, sb: SupabaseClient | None, ai: OpenAI | None):
+    process_gainer(sb, ai, payload)
+    return None
+
+
+HANDLERS = {
+    "boosts": run_boosts,
+    "tokens": run_tokens,
+    "search": run_search,
+    "gecko": run_gecko,
+    "merge": run_merge,
+    "enrich": run_enrich,
+}
+
+
+# ---------------------------------------------------------------------------
+# Worker loop
+# ---------------------------------------------------------------------------
+
+def run_worker_round(store, worker_id: str, start: datetime.datetime | None = None) -> int:
+    """
+    Join the current round and lease units until the round is finished
+    or its time window runs out. Returns the number of units this worker
+    completed.
+    """
+    start = start or round_start()
+    round_id = round_key(start)
+    end = start + datetime.timedelta(minutes=ROUND_MINUTES, seconds=-ROUND_MARGIN_SECONDS)
+
+    if datetime.datetime.now(datetime.timezone.utc) >= end:
+        logger.info("Round %s is closing – worker %s will join the next one.", round_id, worker_id)
+        return 0
+
+    done = 0
+    enqueued = False
+
+    # One set of clients per round, shared by every unit this worker runs.
+    # Leases can't be renewed, so a GPT call must finish well inside the TTL:
+    # otherwise another worker re-leases the unit and pays for a second call.
+    sb = get_supabase()
+    ai = get_openai(timeout=LEASE_TTL_SECONDS / 2, max_retries=0)
+
+    while datetime.datetime.now(datetime.timezone.utc) < end:
+        try:
+            if not enqueued:
+                store.enqueue(round_id, initial_units())
+                enqueued = True
+
+            # Phases are strictly ordered: merge waits for discovery, enrich for merge
+            phase = next(
+                (kinds for kinds in (DISCOVERY_KINDS, MERGE_KINDS, ENRICH_KINDS)
+                 if store.outstanding(round_id, kinds)),
+                None,
+            )
+            if phase is None:
+                break
+
+            unit = store.claim(round_id, worker_id, phase, LEASE_TTL_SECONDS)
+        except Exception as exc:
+            # Transient store errors shouldn't end the round – retry until `end`
+            logger.error("Lease store error in round %s: %s", round_id, exc)
+            time.sleep(POLL_SECONDS)
+            continue
+
+        if unit is None:
+            # Everything left is leased by other workers – wait for them
+            # (or for their leases to expire).
+            time.sleep(POLL_SECONDS)
+            continue
+
+        try:
+            result = HANDLERS[unit["kind"]](store, round_id, unit["payload"], sb, ai)
+        except Exception as exc:
+            logger.error("Unit %s failed: %s", unit["key"], exc)
+            # Hand the unit straight back; discovery falls back to no pairs
+            fallback = [] if unit["kind"] in DISCOVERY_KINDS else None
+            try:
+                if store.release(round_id, unit["key"], worker_id, UNIT_MAX_ATTEMPTS, fallback):
+                    logger.warning("Giving up on %s after %d attempts.", unit["key"], UNIT_MAX_ATTEMPTS)
+            except Exception as release_exc:
+                # The lease will simply expire instead
+                logger.error("Releasing %s failed: %s", unit["key"], release_exc)
+            continue
+
+        try:
+            completed = store.complete(round_id, unit["key"], worker_id, result)
+        except Exception as exc:
+            # The lease expires and another worker redoes the unit
+            logger.error("Completing %s failed: %s", unit["key"], exc)
+            time.sleep(POLL_SECONDS)
+            continue
+
+        if completed:
+            done += 1
+        else:
+            logger.warning("Lease on %s was lost before completion.", unit["key"])
+    else:
+        logger.warning("Round %s ran out of time with work outstanding.", round_id)
+
+    logger.info("Worker %s finished round %s (%d unit(s)).", worker_id, round_id, done)
+    return done
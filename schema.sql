@@ -66,3 +66,93 @@ create policy "Service role only"
   on public.notification_subscribers for all
   using ( true )
   with check ( true );
+
+
+-- ============================================================
+-- Scan work units (sharded workers, see backend/worker.py)
+-- ============================================================
+
+create table if not exists public.scan_units (
+  round_id text not null,
+  unit_key text not null,
+  kind text not null,
+  payload jsonb default '{}'::jsonb,
+  status text not null default 'pending',  -- pending | leased | done
+  owner text,
+  lease_until timestamp with time zone,
+  attempts int not null default 0,
+  result jsonb,
+  primary key (round_id, unit_key)
+);
+
+create index if not exists scan_units_claim_idx on public.scan_units (round_id, kind, status);
+
+alter table public.scan_units enable row level security;
+
+-- Units feed trusted input into the public signals feed, so only the
+-- service role (backend workers) may touch them – never the anon key.
+create policy "Service role only"
+  on public.scan_units for all
+  to service_role
+  using ( true )
+  with check ( true );
+
+-- Atomically lease one pending (or expired) unit of the given kinds.
+-- SKIP LOCKED keeps concurrent workers from blocking on the same row.
+create or replace function public.claim_scan_unit(
+  p_round_id text,
+  p_worker_id text,
+  p_kinds text[],
+  p_ttl_seconds int
+) returns setof public.scan_units
+language sql
+as $$
+  update public.scan_units u
+     set status = 'leased',
+         owner = p_worker_id,
+         lease_until = now() + make_interval(secs => p_ttl_seconds)
+   where (u.round_id, u.unit_key) = (
+     select round_id, unit_key
+       from public.scan_units
+      where round_id = p_round_id
+        and kind = any(p_kinds)
+        and (status = 'pending' or (status = 'leased' and lease_until < now()))
+      order by unit_key
+      limit 1
+      for update skip locked
+   )
+  returning u.*;
+$$;
+
+-- Release a unit whose handler failed so another attempt can pick it up
+-- right away. After p_max_attempts failures the unit is marked done with
+-- p_fallback so later phases can run on partial data.
+create or replace function public.release_scan_unit(
+  p_round_id text,
+  p_unit_key text,
+  p_worker_id text,
+  p_max_attempts int,
+  p_fallback jsonb
+) returns setof public.scan_units
+language sql
+as $$
+  update public.scan_units
+     set attempts = attempts + 1,
+         status = case when attempts + 1 >= p_max_attempts then 'done' else 'pending' end,
+         result = case when attempts + 1 >= p_max_attempts then p_fallback else result end,
+         owner = null,
+         lease_until = null
+   where round_id = p_round_id
+     and unit_key = p_unit_key
+     and owner = p_worker_id
+     and status = 'leased'
+  returning *;
+$$;
+
+-- Functions are executable by PUBLIC by default; restrict to workers.
+revoke execute on function public.claim_scan_unit(text, text, text[], int)
+  from public, anon, authenticated;
+revoke execute on function public.release_scan_unit(text, text, text, int, jsonb)
+  from public, anon, authenticated;
+grant execute on function public.claim_scan_unit(text, text, text[], int) to service_role;
+grant execute on function public.release_scan_unit(text, text, text, int, jsonb) to service_role;